@@ -0,0 +1,14 @@
+CREATE TABLE "camera_leases" (
+	"camera_id" integer PRIMARY KEY NOT NULL,
+	"worker_id" varchar(255) NOT NULL,
+	"acquired_at" timestamp DEFAULT now(),
+	"expires_at" timestamp NOT NULL
+);
+--> statement-breakpoint
+CREATE TABLE "video_workers" (
+	"worker_id" varchar(255) PRIMARY KEY NOT NULL,
+	"started_at" timestamp DEFAULT now(),
+	"heartbeat_at" timestamp DEFAULT now() NOT NULL
+);
+--> statement-breakpoint
+ALTER TABLE "camera_leases" ADD CONSTRAINT "camera_leases_camera_id_camera_streams_id_fk" FOREIGN KEY ("camera_id") REFERENCES "public"."camera_streams"("id") ON DELETE cascade ON UPDATE no action;
\ No newline at end of file
@@ -64,4 +64,19 @@ export const sessions = pgTable('sessions', {
     userId: integer('user_id').notNull().references(() => users.id, { onDelete: 'cascade' }),
     expires: timestamp('expires', { precision: 3 }).notNull(),
     sessionToken: text('session_token').notNull().unique(),
-});
\ No newline at end of file
+});
+
+// Video workers registry (heartbeats from video processing instances)
+export const videoWorkers = pgTable('video_workers', {
+    workerId: varchar('worker_id', { length: 255 }).primaryKey(),
+    startedAt: timestamp('started_at').defaultNow(),
+    heartbeatAt: timestamp('heartbeat_at').notNull().defaultNow(),
+});
+
+// Camera leases (which video worker currently processes a camera)
+export const cameraLeases = pgTable('camera_leases', {
+    cameraId: integer('camera_id').primaryKey().references(() => cameraStreams.id, { onDelete: 'cascade' }),
+    workerId: varchar('worker_id', { length: 255 }).notNull(),
+    acquiredAt: timestamp('acquired_at').defaultNow(),
+    expiresAt: timestamp('expires_at').notNull(),
+});
@@ -17,6 +17,13 @@ import io
 from minio import Minio
 from minio.error import S3Error
 import json
+import signal
+import threading
+from sharding import (
+    LeaseCoordinator,
+    DEFAULT_LEASE_TTL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+)
 
 # Setup logging
 logging.basicConfig(
@@ -34,6 +41,23 @@ parser.add_argument(
     default=10,
     help="Minimum interval between alerts in seconds",
 )
+parser.add_argument(
+    "--worker-id",
+    default=None,
+    help="Unique name of this worker (default: WORKER_ID env or hostname-pid)",
+)
+parser.add_argument(
+    "--lease-ttl",
+    type=int,
+    default=DEFAULT_LEASE_TTL,
+    help="Seconds before cameras of a silent worker are reassigned",
+)
+parser.add_argument(
+    "--heartbeat-interval",
+    type=int,
+    default=DEFAULT_HEARTBEAT_INTERVAL,
+    help="Seconds between worker heartbeats and camera rebalancing",
+)
 args = parser.parse_args()
 
 # Database configuration
@@ -76,33 +100,6 @@ def get_db_connection():
         raise
 
 
-# Get the first active camera from database
-def get_first_active_camera():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute(
-            "SELECT id, name, stream_url, location, latitude, longitude FROM camera_streams WHERE active = true ORDER BY id LIMIT 1"
-        )
-        camera = cursor.fetchone()
-
-        if not camera:
-            raise ValueError("No active cameras found in database")
-
-        return {
-            "id": camera[0],
-            "name": camera[1],
-            "stream_url": camera[2],
-            "location": camera[3],
-            "latitude": camera[4],
-            "longitude": camera[5],
-        }
-    finally:
-        cursor.close()
-        conn.close()
-
-
 # Get camera details from database
 def get_camera_details(camera_id):
     conn = get_db_connection()
@@ -368,51 +365,39 @@ violation_map = {
 }
 
 
-def main():
-    min_interval = args.interval
-    logger.info(f"Minimum alert interval: {min_interval} seconds")
-
-    # Get the first active camera from the database
-    try:
-        camera = get_first_active_camera()
-        camera_id = camera["id"]
-        stream_url = camera["stream_url"]
-        logger.info(
-            f"Processing stream for camera: {camera['name']} at {camera['location']}"
-        )
-    except Exception as e:
-        logger.error(f"Failed to get camera: {e}")
-        return
-
-    # Load model
-    try:
-        model = load_model()
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        return
-
-    # Initialize video capture
-    try:
-        cap = cv2.VideoCapture(stream_url)
-        if not cap.isOpened():
-            raise ValueError("Could not open video stream")
-        logger.info("Video stream opened successfully")
-    except Exception as e:
-        logger.error(f"Error opening video stream: {e}")
-        return
+# Process one camera stream until stop_event is set
+def process_camera(camera, model, min_interval, stop_event, coordinator):
+    camera_id = camera["id"]
+    stream_url = camera["stream_url"]
+    logger.info(
+        f"Processing stream for camera: {camera['name']} at {camera['location']}"
+    )
 
+    cap = None
     last_alert_time = 0
     frame_count = 0
     process_interval = 30  # Process every 30 frames
 
     try:
-        while True:
+        while not stop_event.is_set():
+            if cap is None:
+                cap = cv2.VideoCapture(stream_url)
+                if not cap.isOpened():
+                    logger.error(f"Could not open video stream for camera {camera_id}")
+                    cap.release()
+                    cap = None
+                    stop_event.wait(5)  # Wait before reconnecting
+                    continue
+                logger.info(f"Video stream for camera {camera_id} opened successfully")
+
             ret, frame = cap.read()
             if not ret:
-                logger.warning("Could not read frame, reconnecting...")
+                logger.warning(
+                    f"Could not read frame from camera {camera_id}, reconnecting..."
+                )
                 cap.release()
-                time.sleep(5)  # Wait before reconnecting
-                cap = cv2.VideoCapture(stream_url)
+                cap = None
+                stop_event.wait(5)  # Wait before reconnecting
                 continue
 
             frame_count += 1
@@ -423,6 +408,11 @@ def main():
             if current_time - last_alert_time < min_interval:
                 continue  # Skip processing if within minimum interval
 
+            # Never process a camera whose lease may already belong to another worker
+            if not coordinator.holds(camera_id):
+                logger.warning(f"Lease for camera {camera_id} lost, stopping")
+                break
+
             # Detect objects in the frame
             detections = detect_objects(frame, model)
 
@@ -432,6 +422,9 @@ def main():
                     detection["class"] in violation_map
                     and detection["confidence"] > 0.5
                 ):
+                    if not coordinator.holds(camera_id):
+                        break  # Lease lost during inference
+
                     violation = violation_map[detection["class"]]
 
                     # Save the frame to MinIO
@@ -457,13 +450,93 @@ def main():
                     last_alert_time = current_time
                     break  # Only create one alert per processing cycle
 
-    except KeyboardInterrupt:
-        logger.info("Stopping video processing")
     except Exception as e:
-        logger.error(f"Error in video processing: {e}")
+        logger.error(f"Error in video processing for camera {camera_id}: {e}")
     finally:
         if cap is not None:
             cap.release()
+        logger.info(f"Video processing stopped for camera {camera_id}")
+
+
+def main():
+    min_interval = args.interval
+    logger.info(f"Minimum alert interval: {min_interval} seconds")
+
+    # Stop gracefully on `docker stop` so our cameras are handed over immediately
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    # Load model
+    try:
+        model = load_model()
+    except Exception as e:
+        logger.error(f"Failed to load model: {e}")
+        return
+
+    # Join the pool of video workers sharing the active cameras
+    coordinator = LeaseCoordinator(
+        DATABASE_URL,
+        worker_id=args.worker_id,
+        lease_ttl=args.lease_ttl,
+        heartbeat_interval=args.heartbeat_interval,
+    )
+    logger.info(f"Video worker {coordinator.worker_id} started")
+
+    running = {}  # camera_id -> (thread, stop_event)
+    stopping = {}  # camera_id -> thread asked to stop but not finished yet
+
+    try:
+        while True:
+            owned = coordinator.poll()
+
+            # Stop cameras we no longer hold (rebalanced away, deactivated or lease lost)
+            for camera_id in list(running):
+                thread, stop_event = running[camera_id]
+                if camera_id not in owned or not thread.is_alive():
+                    stop_event.set()
+                    stopping[camera_id] = thread
+                    del running[camera_id]
+
+            # Only hand a lease back once its thread has really finished;
+            # a thread that stays stuck lets the lease expire instead
+            for camera_id in list(stopping):
+                if stopping[camera_id].is_alive():
+                    continue
+                del stopping[camera_id]
+                if camera_id not in owned:
+                    coordinator.release(camera_id)
+
+            # Start cameras we have just acquired
+            for camera_id, camera in owned.items():
+                if camera_id in running or camera_id in stopping:
+                    continue  # Wait for the previous thread of this camera to exit
+                stop_event = threading.Event()
+                thread = threading.Thread(
+                    target=process_camera,
+                    args=(camera, model, min_interval, stop_event, coordinator),
+                    name=f"camera-{camera_id}",
+                    daemon=True,
+                )
+                thread.start()
+                running[camera_id] = (thread, stop_event)
+
+            time.sleep(coordinator.heartbeat_interval)
+
+    except KeyboardInterrupt:
+        logger.info("Stopping video processing")
+    finally:
+        coordinator.drop_cameras()  # Threads stop before their next inference or alert
+        for thread, stop_event in running.values():
+            stop_event.set()
+        threads = {camera_id: thread for camera_id, (thread, _) in running.items()}
+        threads.update(stopping)
+
+        # Wait for all threads together, well within the 10 s `docker stop` grace period
+        deadline = time.monotonic() + 5
+        for camera_id, thread in threads.items():
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+            if not thread.is_alive():
+                coordinator.release(camera_id)
+        coordinator.shutdown()
         logger.info("Video processing stopped")
 
 
@@ -0,0 +1,306 @@
+import argparse
+import hashlib
+import logging
+import os
+import signal
+import socket
+import time
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_TTL = 10  # seconds without a heartbeat before a worker is considered dead
+DEFAULT_HEARTBEAT_INTERVAL = 2  # seconds between heartbeats / rebalancing rounds
+
+
+# Default worker id, unique per process and per container
+def default_worker_id():
+    return os.environ.get("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+# Pick the owner of every camera with rendezvous (highest random weight) hashing,
+# so adding or removing a worker only moves the cameras of that worker
+def assign_cameras(camera_ids, worker_ids):
+    assignment = {}
+    if not worker_ids:
+        return assignment
+
+    for camera_id in camera_ids:
+        assignment[camera_id] = max(
+            worker_ids,
+            key=lambda worker_id: hashlib.sha1(
+                f"{worker_id}:{camera_id}".encode()
+            ).digest(),
+        )
+    return assignment
+
+
+class LeaseCoordinator:
+    """Splits active cameras between video workers using leases in Postgres.
+
+    Every worker heartbeats into ``video_workers`` and, on each round, computes
+    which cameras it should own among the live workers. Ownership is confirmed
+    by a row in ``camera_leases`` that is only taken over once the previous
+    holder released it or let it expire, so a camera is never processed by
+    two workers holding a valid lease. All timestamps come from the database
+    clock, so workers do not need synchronised clocks.
+
+    Camera threads must check ``holds()`` before doing any work: it turns false
+    once the lease may have expired, even while ``sync()`` is still blocked on
+    the database. Cameras that move to another worker are simply not renewed;
+    their leases are deleted early only after ``release()`` confirms that the
+    camera is no longer processed here.
+    """
+
+    def __init__(
+        self,
+        dsn,
+        worker_id=None,
+        lease_ttl=DEFAULT_LEASE_TTL,
+        heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL,
+    ):
+        if heartbeat_interval >= lease_ttl:
+            raise ValueError("Heartbeat interval must be shorter than lease TTL")
+
+        self.dsn = dsn
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        # Database calls must give up well before our leases run out
+        self.db_timeout = max(1, int(lease_ttl - heartbeat_interval) // 2)
+        self.owned = {}
+        self.lease_valid_until = 0  # time.monotonic() deadline of our leases
+        self._released = set()  # cameras no longer processed here, lease can go
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(
+                dsn=self.dsn,
+                connect_timeout=self.db_timeout,
+                options=f"-c statement_timeout={self.db_timeout * 1000}",
+                keepalives=1,
+                keepalives_idle=self.db_timeout,
+                keepalives_interval=1,
+                keepalives_count=3,
+                tcp_user_timeout=self.db_timeout * 1000,
+            )
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    # Run one heartbeat / rebalancing round and return the cameras we hold
+    def sync(self):
+        started = time.monotonic()
+        conn = self._connection()
+        with conn, conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO video_workers (worker_id, heartbeat_at)
+                VALUES (%s, now())
+                ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = now()
+                """,
+                (self.worker_id,),
+            )
+
+            cursor.execute(
+                """
+                SELECT worker_id FROM video_workers
+                WHERE heartbeat_at >= now() - make_interval(secs => %s)
+                ORDER BY worker_id
+                """,
+                (self.lease_ttl,),
+            )
+            worker_ids = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(
+                "SELECT id, name, stream_url, location, latitude, longitude FROM camera_streams WHERE active = true ORDER BY id"
+            )
+            cameras = {
+                row[0]: {
+                    "id": row[0],
+                    "name": row[1],
+                    "stream_url": row[2],
+                    "location": row[3],
+                    "latitude": row[4],
+                    "longitude": row[5],
+                }
+                for row in cursor.fetchall()
+            }
+
+            assignment = assign_cameras(list(cameras), worker_ids)
+            wanted = sorted(
+                camera_id
+                for camera_id, worker_id in assignment.items()
+                if worker_id == self.worker_id
+            )
+
+            # Hand back cameras stopped since the previous round, unless they are
+            # ours again; cameras we stop wanting now just aren't renewed below
+            released = sorted(self._released)
+            cursor.execute(
+                """
+                DELETE FROM camera_leases
+                WHERE worker_id = %s
+                    AND camera_id = ANY(%s::int[])
+                    AND NOT (camera_id = ANY(%s::int[]))
+                """,
+                (self.worker_id, released, wanted),
+            )
+
+            # Renew our leases and take over free or expired ones
+            cursor.execute(
+                """
+                INSERT INTO camera_leases (camera_id, worker_id, expires_at)
+                SELECT camera_id, %s, now() + make_interval(secs => %s)
+                FROM unnest(%s::int[]) AS camera_id
+                ON CONFLICT (camera_id) DO UPDATE SET
+                    worker_id = EXCLUDED.worker_id,
+                    expires_at = EXCLUDED.expires_at,
+                    acquired_at = CASE
+                        WHEN camera_leases.worker_id = EXCLUDED.worker_id
+                        THEN camera_leases.acquired_at
+                        ELSE now()
+                    END
+                WHERE camera_leases.worker_id = EXCLUDED.worker_id
+                    OR camera_leases.expires_at < now()
+                RETURNING camera_id
+                """,
+                (self.worker_id, self.lease_ttl, wanted),
+            )
+            held = {row[0] for row in cursor.fetchall()}
+
+            # Forget workers that stopped heartbeating long ago
+            cursor.execute(
+                "DELETE FROM video_workers WHERE heartbeat_at < now() - make_interval(secs => %s)",
+                (self.lease_ttl * 6,),
+            )
+
+        self._released.difference_update(released)
+        owned = {camera_id: cameras[camera_id] for camera_id in sorted(held)}
+        if owned.keys() != self.owned.keys():
+            logger.info(
+                f"Worker {self.worker_id} ({len(worker_ids)} live) now holds "
+                f"{len(owned)}/{len(cameras)} cameras: {list(owned)}"
+            )
+        # The lease was renewed no earlier than `started`; keep a heartbeat of
+        # margin so in-flight work finishes before another worker may take over
+        self.lease_valid_until = started + self.lease_ttl - self.heartbeat_interval
+        self.owned = owned
+        return owned
+
+    # Whether we may still process a camera (thread-safe, never blocks)
+    def holds(self, camera_id):
+        return camera_id in self.owned and time.monotonic() < self.lease_valid_until
+
+    # Mark a camera as no longer processed here, its lease is deleted next round
+    def release(self, camera_id):
+        self._released.add(camera_id)
+
+    # Stop processing everything we hold without touching the database
+    def drop_cameras(self):
+        self.lease_valid_until = 0
+        self.owned = {}
+
+    # Same as sync(), but survives database errors; if our leases may expire
+    # before the next round we drop every camera so another worker can take it over
+    def poll(self):
+        try:
+            return self.sync()
+        except Exception as e:
+            logger.error(f"Lease sync failed for worker {self.worker_id}: {e}")
+            self._close()
+
+        if self.owned and time.monotonic() >= self.lease_valid_until:
+            logger.warning(
+                f"Leases of worker {self.worker_id} expired, dropping {len(self.owned)} cameras"
+            )
+            self.drop_cameras()
+        return self.owned
+
+    # Unregister and delete the leases of released cameras, so other workers pick
+    # them up immediately; leases of cameras still being stopped just expire
+    def shutdown(self):
+        self.drop_cameras()
+        try:
+            conn = self._connection()
+            with conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM camera_leases WHERE worker_id = %s AND camera_id = ANY(%s::int[])",
+                    (self.worker_id, sorted(self._released)),
+                )
+                cursor.execute(
+                    "DELETE FROM video_workers WHERE worker_id = %s",
+                    (self.worker_id,),
+                )
+            logger.info(
+                f"Worker {self.worker_id} released {len(self._released)} leases"
+            )
+            self._released.clear()
+        except Exception as e:
+            logger.error(f"Failed to release leases for worker {self.worker_id}: {e}")
+        finally:
+            self._close()
+
+
+# Run only the lease coordinator (no video processing), e.g. several of these
+# in separate terminals against one Postgres to watch cameras being rebalanced
+def main():
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Camera lease coordinator for video workers (dry run)"
+    )
+    parser.add_argument("--worker-id", default=None, help="Unique worker name")
+    parser.add_argument(
+        "--lease-ttl",
+        type=int,
+        default=DEFAULT_LEASE_TTL,
+        help="Seconds before cameras of a silent worker are reassigned",
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=int,
+        default=DEFAULT_HEARTBEAT_INTERVAL,
+        help="Seconds between heartbeats",
+    )
+    args = parser.parse_args()
+
+    database_url = os.environ.get("DATABASE_URL", "localhost")
+    coordinator = LeaseCoordinator(
+        database_url,
+        worker_id=args.worker_id,
+        lease_ttl=args.lease_ttl,
+        heartbeat_interval=args.heartbeat_interval,
+    )
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    logger.info(f"Worker {coordinator.worker_id} started")
+
+    held = {}
+    try:
+        while True:
+            owned = coordinator.poll()
+            # Nothing to stop in a dry run, hand cameras back on the next round
+            for camera_id in held.keys() - owned.keys():
+                coordinator.release(camera_id)
+            held = owned
+            time.sleep(coordinator.heartbeat_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for camera_id in coordinator.owned:
+            coordinator.release(camera_id)
+        coordinator.shutdown()
+
+
+if __name__ == "__main__":
+    main()